@@ -1,5 +1,7 @@
 import os
+import time
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
 
 import jwt
@@ -96,6 +98,23 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
+@lru_cache(maxsize=4096)
+def _decode_token(token: str) -> dict:
+    """Decode and verify a JWT signature, cached per token string.
+
+    Tokens are immutable, so repeating the HMAC verification on every
+    authenticated request is wasted CPU. Expiry is deliberately not
+    verified here: the caller checks `exp` against the clock on every
+    cache hit, so a token that expires while cached is still rejected.
+    """
+    return jwt.decode(
+        token,
+        SECRET_KEY,
+        algorithms=[ALGORITHM],
+        options={"verify_exp": False},
+    )
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
 ) -> User:
@@ -110,9 +129,10 @@ async def get_current_user(
         raise credentials_exception
 
     try:
-        payload = jwt.decode(
-            credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM]
-        )
+        payload = _decode_token(credentials.credentials)
+        exp = payload.get("exp")
+        if exp is not None and exp <= time.time():
+            raise credentials_exception
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
@@ -7,6 +7,10 @@ class Settings(BaseSettings):
     log_level: str = "info"
     environment: str = "development"
 
+    # Echo every SQL statement SQLAlchemy runs. Formatting and logging
+    # each statement is expensive, so keep this off unless debugging.
+    sql_echo: bool = False
+
     # Database configuration
     pg_host: str = "db"
     pg_port: int = 5432
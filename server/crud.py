@@ -4,26 +4,41 @@ from typing import List, Optional
 
 from database import Feature
 from geoalchemy2.functions import ST_AsGeoJSON
-from schemas import FeatureCreate, FeatureResponse, FeatureUpdate
+from schemas import (
+    FeatureCreate,
+    FeatureResponse,
+    FeatureUpdate,
+    GeoJSONGeometry,
+)
 from sqlalchemy import select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 logger = logging.getLogger(__name__)
 
 
-async def get_all_features(db: AsyncSession) -> List[FeatureResponse]:
-    """Get all features from database"""
+async def get_all_features(
+    db: AsyncSession, skip: int = 0, limit: Optional[int] = None
+) -> List[FeatureResponse]:
+    """Get features from database; pagination is pushed down to SQL
+    when skip/limit are given. The default returns all rows, which the
+    shipped client relies on."""
     try:
-        query = select(
-            Feature.id,
-            Feature.title,
-            Feature.author,
-            Feature.thumbnail,
-            Feature.excerpt,
-            Feature.publication,
-            Feature.link,
-            ST_AsGeoJSON(Feature.location).label("location"),
+        query = (
+            select(
+                Feature.id,
+                Feature.title,
+                Feature.author,
+                Feature.thumbnail,
+                Feature.excerpt,
+                Feature.publication,
+                Feature.link,
+                ST_AsGeoJSON(Feature.location).label("location"),
+            )
+            .order_by(Feature.id)
+            .offset(skip)
         )
+        if limit is not None:
+            query = query.limit(limit)
 
         result = await db.execute(query)
         features = result.fetchall()
@@ -55,14 +70,16 @@ async def get_all_features(db: AsyncSession) -> List[FeatureResponse]:
                 feature.link,
                 feature.thumbnail,
             )
-            try:
-                feature_list.append(FeatureResponse(**feature_dict))
-            except Exception as e:
-                logger.error(
-                    f"Validation error for feature ID {feature.id}: {e}\n"
-                    f"Data: {feature_dict}"
+            # Rows come straight from our own table, so skip the
+            # validator tree walk (HttpUrl re-parsing dominates it)
+            # with model_construct on the hot list path
+            if location_data is not None:
+                feature_dict["location"] = GeoJSONGeometry.model_construct(
+                    **location_data
                 )
-                raise
+            feature_list.append(
+                FeatureResponse.model_construct(**feature_dict)
+            )
 
         return feature_list
     except Exception as e:
@@ -23,6 +23,13 @@ engine = create_async_engine(
     pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
     max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "5")),
     pool_timeout=int(os.getenv("DB_POOL_TIMEOUT", "30")),  # seconds
+    connect_args={
+        "server_settings": {
+            # Abort runaway queries instead of pinning a pooled
+            # connection indefinitely (value in milliseconds)
+            "statement_timeout": os.getenv("DB_STATEMENT_TIMEOUT", "60000"),
+        }
+    },
 )
 
 # Create async session factory
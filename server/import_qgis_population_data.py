@@ -4,11 +4,10 @@ This script loads the data into your production database
 """
 
 import asyncio
-import json
 import logging
 from pathlib import Path
 
-from shapely.geometry import shape
+import orjson
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine
 
@@ -37,8 +36,10 @@ async def import_population_data():
     logger.info(f"Loading data from: {geojson_path}")
 
     try:
-        with open(geojson_path, "r", encoding="utf-8") as f:
-            geojson_data = json.load(f)
+        # orjson parses the multi-MB GeoJSON noticeably faster than the
+        # stdlib and takes the raw bytes directly
+        with open(geojson_path, "rb") as f:
+            geojson_data = orjson.loads(f.read())
     except Exception as e:
         logger.error(f"Failed to load GeoJSON: {e}")
         return
@@ -51,69 +52,145 @@ async def import_population_data():
         logger.warning("No features found in GeoJSON")
         return
 
-    async with engine.begin() as conn:
-        # Clear existing data (optional - remove to keep existing data)
-        logger.info("Clearing existing population density data...")
-        await conn.execute(text("DELETE FROM pop_density_by_country_2022_num"))
-
-        # Import new data
-        success_count = 0
-        error_count = 0
-
-        for feature in features:
-            try:
-                properties = feature.get("properties", {})
-                geometry = feature.get("geometry")
-
-                if not geometry:
-                    country_name = properties.get("NAME", "Unknown")
-                    logger.warning(
-                        f"Skipping feature without geometry: {country_name}"
-                    )
-                    error_count += 1
-                    continue
-
-                # Extract properties
-                name = properties.get("NAME")
-                iso_a3 = properties.get("ISO_A3")
-                pop_density = properties.get("pop_density_2022_num")
-
-                # Convert geometry to WKT for PostGIS
-                shapely_geom = shape(geometry)
-                geom_wkt = shapely_geom.wkt
-
-                # Insert into database
-                query = text(
-                    """
-                    INSERT INTO pop_density_by_country_2022_num (
-                        "NAME", "ISO_A3", pop_density_2022_num, geom
-                    ) VALUES (
-                        :name, :iso_a3, :pop_density,
-                        ST_GeomFromText(:geom_wkt, 4326)
-                    )
-                """
-                )
+    # Collect rows up front; geometries go in as GeoJSON so PostGIS does
+    # the conversion server-side (no per-feature shapely/WKT step)
+    rows = []
+    error_count = 0
+    for feature in features:
+        properties = feature.get("properties", {})
+        geometry = feature.get("geometry")
+
+        if not geometry:
+            country_name = properties.get("NAME", "Unknown")
+            logger.warning(
+                f"Skipping feature without geometry: {country_name}"
+            )
+            error_count += 1
+            continue
+
+        rows.append(
+            {
+                "name": properties.get("NAME"),
+                "iso_a3": properties.get("ISO_A3"),
+                "pop_density": properties.get("pop_density_2022_num"),
+                "geom": geometry,
+            }
+        )
 
-                await conn.execute(
-                    query,
-                    {
-                        "name": name,
-                        "iso_a3": iso_a3,
-                        "pop_density": pop_density,
-                        "geom_wkt": geom_wkt,
-                    },
-                )
+    # The upsert conflicts on ISO_A3, so de-duplicate real codes first
+    # (last one wins). Natural Earth shares the placeholder '-99'
+    # between several territories (France, Norway, Kosovo in some
+    # exports), so those rows — like rows with no code at all — must
+    # not go through the conflict path: they are deleted and
+    # re-inserted instead, keeping every territory on the layer.
+    deduped: dict = {}
+    no_conflict = []
+    for row in rows:
+        if row["iso_a3"] and row["iso_a3"] != "-99":
+            deduped[row["iso_a3"]] = row
+        else:
+            no_conflict.append(row)
+    dropped = len(rows) - len(deduped) - len(no_conflict)
+    if dropped:
+        logger.warning(
+            f"Dropped {dropped} duplicate ISO_A3 rows (last one wins)"
+        )
+    upsert_rows = list(deduped.values())
+
+    # Prepared once by asyncpg; all parameter sets then stream over the
+    # binary protocol in a single executemany call, so there is no jsonb
+    # batch payload for the server to re-parse
+    upsert_sql = """
+        INSERT INTO pop_density_by_country_2022_num (
+            "NAME", "ISO_A3", pop_density_2022_num, geom
+        ) VALUES ($1, $2, $3, ST_SetSRID(ST_GeomFromGeoJSON($4), 4326))
+        ON CONFLICT ("ISO_A3") WHERE "ISO_A3" <> '-99' DO UPDATE SET
+            "NAME" = EXCLUDED."NAME",
+            pop_density_2022_num = EXCLUDED.pop_density_2022_num,
+            geom = EXCLUDED.geom
+    """
+
+    plain_insert_sql = """
+        INSERT INTO pop_density_by_country_2022_num (
+            "NAME", "ISO_A3", pop_density_2022_num, geom
+        ) VALUES ($1, $2, $3, ST_SetSRID(ST_GeomFromGeoJSON($4), 4326))
+    """
+
+    unique_index_sql = text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_pop_density_iso_uniq_part "
+        'ON pop_density_by_country_2022_num ("ISO_A3") '
+        "WHERE \"ISO_A3\" <> '-99'"
+    )
+
+    # The upsert needs a unique index on real ISO_A3 codes. The index
+    # is partial because '-99' is shared by several territories and
+    # must stay duplicable — which also means any older full unique
+    # index has to go first. Legacy databases can additionally hold
+    # duplicate real codes from old delete+insert imports; clear them
+    # once so the index can be built.
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(
+                text("DROP INDEX IF EXISTS idx_pop_density_iso_uniq")
+            )
+            await conn.execute(unique_index_sql)
+    except Exception as e:
+        logger.warning(
+            f"Unique ISO_A3 index failed ({e}); clearing legacy data first"
+        )
+        async with engine.begin() as conn:
+            await conn.execute(
+                text("DELETE FROM pop_density_by_country_2022_num")
+            )
+            await conn.execute(unique_index_sql)
 
-                success_count += 1
+    async with engine.begin() as conn:
+        # Rows whose code is missing or the shared '-99' placeholder
+        # never take the conflict path, so drop the stale ones and
+        # re-insert them below. Everything else is updated in place by
+        # the upsert — no table-wide DELETE, dead tuples or index
+        # churn.
+        await conn.execute(
+            text(
+                "DELETE FROM pop_density_by_country_2022_num "
+                "WHERE \"ISO_A3\" IS NULL OR \"ISO_A3\" = '-99'"
+            )
+        )
 
-                if success_count % 50 == 0:
-                    logger.info(f"Imported {success_count} countries...")
+        # A failure rolls back the whole transaction rather than leaving
+        # a partial import behind
+        raw = await conn.get_raw_connection()
+        driver = raw.driver_connection
+        await driver.executemany(
+            upsert_sql,
+            [
+                (
+                    row["name"],
+                    row["iso_a3"],
+                    row["pop_density"],
+                    orjson.dumps(row["geom"]).decode(),
+                )
+                for row in upsert_rows
+            ],
+        )
+        if no_conflict:
+            await driver.executemany(
+                plain_insert_sql,
+                [
+                    (
+                        row["name"],
+                        row["iso_a3"],
+                        row["pop_density"],
+                        orjson.dumps(row["geom"]).decode(),
+                    )
+                    for row in no_conflict
+                ],
+            )
+        success_count = len(upsert_rows) + len(no_conflict)
+        logger.info(f"Imported {success_count} countries...")
 
-            except Exception as e:
-                error_count += 1
-                country_name = properties.get("NAME", "Unknown")
-                logger.error(f"Failed to import {country_name}: {e}")
-                continue
+        # Refresh planner stats after the bulk upsert
+        await conn.execute(text("ANALYZE pop_density_by_country_2022_num"))
 
     logger.info(
         f"Import completed: {success_count} successful, {error_count} errors"
@@ -113,6 +113,17 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"⚠️ Database connection failed: {e}")
         print("🔄 Continuing without database...")
+    # Ensure the geo tables once per process so the layer request paths
+    # never pay for the DDL round-trips
+    try:
+        from database import async_session_maker
+        from routes.layers import _ensure_geo_tables
+
+        async with async_session_maker() as session:
+            await _ensure_geo_tables(session)
+        print("✅ Geo tables ensured")
+    except Exception as e:
+        print(f"⚠️ Geo table setup deferred to first request: {e}")
     yield
     # Shutdown
 
@@ -29,7 +29,7 @@ async def run_migration_file(filepath: str) -> bool:
         database_url = settings.database_url
         logger.info(f"Using database URL: {database_url}")
 
-        engine = create_async_engine(database_url, echo=True)
+        engine = create_async_engine(database_url, echo=settings.sql_echo)
 
         async with engine.begin() as conn:
             # Split on semicolons and execute each statement separately
@@ -52,7 +52,7 @@ async def run_migration_file(filepath: str) -> bool:
 
 
 async def run_all_migrations():
-    """Run all migration files in order"""
+    """Run all migration files in order as one atomic transaction"""
     migration_files = [
         "0001_create_feature_table.sql",
         "0002_add_test_data.sql",
@@ -62,16 +62,36 @@ async def run_all_migrations():
         "0006_create_geo_layers.sql",
     ]
 
-    success_count = 0
+    migrations_dir = Path(__file__).parent / "migrations"
+    scripts = []
     for migration_file in migration_files:
-        if await run_migration_file(migration_file):
-            success_count += 1
-        else:
-            logger.error(f"Migration failed: {migration_file}")
-            break
-
-    logger.info(f"Completed {success_count}/{len(migration_files)} migrations")
-    return success_count == len(migration_files)
+        path = migrations_dir / migration_file
+        if not path.exists():
+            logger.error(f"Migration file not found: {migration_file}")
+            return False
+        with open(path, "r", encoding="utf-8") as f:
+            scripts.append(f.read())
+
+    # One engine, one connection, one transaction: the concatenated
+    # scripts go to the raw asyncpg connection in a single round-trip
+    # (the simple-query protocol runs multi-statement strings
+    # server-side, and not splitting on ";" keeps any quoted bodies
+    # intact). A failure anywhere rolls the whole batch back instead of
+    # leaving a half-applied schema.
+    engine = create_async_engine(
+        settings.database_url, echo=settings.sql_echo
+    )
+    try:
+        async with engine.begin() as conn:
+            raw = await conn.get_raw_connection()
+            await raw.driver_connection.execute("\n".join(scripts))
+        logger.info(f"Completed {len(migration_files)} migrations")
+        return True
+    except Exception as e:
+        logger.error(f"Migrations failed: {e}")
+        return False
+    finally:
+        await engine.dispose()
 
 
 async def reset_database():
@@ -86,7 +106,7 @@ async def drop_all_tables():
         logger.info("🔥 Dropping all tables and extensions...")
 
         database_url = settings.database_url
-        engine = create_async_engine(database_url, echo=True)
+        engine = create_async_engine(database_url, echo=settings.sql_echo)
 
         async with engine.begin() as conn:
             # Drop tables in correct order (analytics tables first,
@@ -7,10 +7,16 @@ import json
 
 from database import get_db
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
-router = APIRouter(prefix="/api/v1/layers", tags=["Layers"])
+# Country GeoJSON responses run to megabytes; encode them with orjson
+router = APIRouter(
+    prefix="/api/v1/layers",
+    tags=["Layers"],
+    default_response_class=ORJSONResponse,
+)
 
 
 @router.get("/population-density-2022")
@@ -1,9 +1,17 @@
 import os
 
-from fastapi import APIRouter
+import orjson
+from fastapi import APIRouter, Response
 
 router = APIRouter(prefix="/api/v1/config", tags=["config"])
 
+# The public config cannot change at runtime (it comes from the process
+# environment), so encode the response once at import time and let
+# clients/CDNs cache it instead of recomputing per request.
+_PUBLIC_CONFIG_BYTES = orjson.dumps(
+    {"cesiumIonToken": os.getenv("CESIUM_ION_TOKEN", "")}
+)
+
 
 @router.get("/public")
 async def get_public_config():
@@ -11,6 +19,8 @@ async def get_public_config():
 
     Cesium Ion token is safe to expose to clients (it's required there).
     """
-    return {
-        "cesiumIonToken": os.getenv("CESIUM_ION_TOKEN", ""),
-    }
+    return Response(
+        content=_PUBLIC_CONFIG_BYTES,
+        media_type="application/json",
+        headers={"Cache-Control": "public, max-age=3600"},
+    )
@@ -15,14 +15,22 @@ router = APIRouter()
 async def get_features(
     category: Optional[str] = Query(None, description="Filter by category"),
     skip: int = Query(0, ge=0, description="Number of records to skip"),
-    limit: int = Query(
-        100, ge=1, le=1000, description="Number of records to return"
+    limit: Optional[int] = Query(
+        None,
+        ge=1,
+        le=1000,
+        description="Number of records to return (default: all)",
     ),
     db: AsyncSession = Depends(get_db),
 ):
     """Get all features with optional filtering and pagination"""
     try:
-        features = await crud.get_all_features(db)
+        # When skip/limit are passed, pagination happens in SQL so the
+        # query reads O(limit) rows; without them all rows come back,
+        # which the shipped client expects. (The feature table has no
+        # category column yet; the parameter is kept for API
+        # compatibility.)
+        features = await crud.get_all_features(db, skip=skip, limit=limit)
         return {"features": features}
     except Exception as e:
         # Return empty features list if database is not available
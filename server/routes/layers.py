@@ -13,19 +13,111 @@ Tables expected (created via migration 0006_create_geo_layers):
     geom geometry(..., 4326))
 """
 
+import os
+import re
+import time
 from typing import Optional
 
 from config import settings
-from database import get_db
-from fastapi import APIRouter, Depends, HTTPException, Query
+from database import async_session_maker, get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from sqlalchemy import Float, Integer, bindparam
+from sqlalchemy import exc as sa_exc
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
-router = APIRouter(prefix="/api/v1/layers", tags=["Layers"])
+# JSON payloads here can be large; orjson's C encoder is several times
+# faster than the stdlib encoder Starlette uses by default
+router = APIRouter(
+    prefix="/api/v1/layers",
+    tags=["Layers"],
+    default_response_class=ORJSONResponse,
+)
+
+# /list is hit on every frontend page load but its content only changes
+# on (re)imports, so serve it from a short-lived in-process cache.
+_LIST_CACHE_TTL = float(os.getenv("LAYERS_LIST_CACHE_TTL", "60"))
+_list_cache: Optional[tuple[float, dict]] = None
+
+# Layer ids are stable once a layer exists, so resolved name → id pairs
+# can live for the process lifetime. The key mirrors the SQL slug
+# normalization (regexp_replace then lower) applied to the request name.
+_slug_re = re.compile(r"[^a-z0-9]+")
+_layer_id_cache: dict[str, int] = {}
+
+# Connectivity failures that should degrade gracefully instead of
+# surfacing a 500: dropped/refused connections, pool checkout timeouts
+# and plain socket errors. Other DBAPI errors only count as transient
+# when SQLAlchemy invalidated the connection.
+_TRANSIENT_DB_ERRORS = (
+    sa_exc.OperationalError,
+    sa_exc.DisconnectionError,
+    sa_exc.TimeoutError,
+    ConnectionError,
+    TimeoutError,
+)
+
+
+def _is_transient_db_error(e: Exception) -> bool:
+    if isinstance(e, _TRANSIENT_DB_ERRORS):
+        return True
+    return isinstance(e, sa_exc.DBAPIError) and e.connection_invalidated
+
+
+# The feature query only comes in four shapes (bbox and limit each on or
+# off). Building them once at import time lets asyncpg and Postgres
+# reuse a cached prepared plan instead of re-parsing a fresh SQL string
+# on every request. Each Feature is assembled as text in one
+# server-side pass; ST_AsGeoJSON(row) isn't usable here because
+# properties is a single jsonb column, so the row form would nest it
+# under a "properties" key inside properties.
+_FEATURE_SELECT = """
+    SELECT '{"type":"Feature","properties":'
+           || COALESCE(properties, '{}'::jsonb)::text
+           || ',"geometry":' || ST_AsGeoJSON(geom) || '}'
+           AS feature
+    FROM geo_features
+    WHERE layer_id = :layer_id
+"""
+_BBOX_FILTER = (
+    " AND ST_Intersects(geom,"
+    " ST_MakeEnvelope(:minx, :miny, :maxx, :maxy, 4326))"
+)
+
+
+def _feature_query(sql, bbox=False, limit=False):
+    binds = [bindparam("layer_id", type_=Integer())]
+    if bbox:
+        binds.extend(
+            bindparam(name, type_=Float())
+            for name in ("minx", "miny", "maxx", "maxy")
+        )
+    if limit:
+        binds.append(bindparam("limit", type_=Integer()))
+    return text(sql).bindparams(*binds).execution_options(yield_per=500)
+
+
+_Q_ALL = _feature_query(_FEATURE_SELECT)
+_Q_BBOX = _feature_query(_FEATURE_SELECT + _BBOX_FILTER, bbox=True)
+_Q_ALL_LIMIT = _feature_query(_FEATURE_SELECT + " LIMIT :limit", limit=True)
+_Q_BBOX_LIMIT = _feature_query(
+    _FEATURE_SELECT + _BBOX_FILTER + " LIMIT :limit", bbox=True, limit=True
+)
+
+
+# The DDL below only needs to succeed once per process; afterwards the
+# request paths skip it entirely. main.py's lifespan runs it at startup
+# so the first real request doesn't pay for it either.
+_schema_ready = False
 
 
 async def _ensure_geo_tables(db: AsyncSession) -> None:
     """Ensure geo_layers and geo_features exist (idempotent)."""
+    global _schema_ready
+    if _schema_ready:
+        return
+
     stmts = [
         """
         CREATE TABLE IF NOT EXISTS geo_layers (
@@ -40,12 +132,13 @@ async def _ensure_geo_tables(db: AsyncSession) -> None:
         """,
         """
         CREATE TABLE IF NOT EXISTS geo_features (
-            id SERIAL PRIMARY KEY,
+            id SERIAL,
             layer_id INTEGER NOT NULL REFERENCES geo_layers(id)
                 ON DELETE CASCADE,
             properties JSONB,
-            geom GEOMETRY(GEOMETRY, 4326) NOT NULL
-        )
+            geom GEOMETRY(GEOMETRY, 4326) NOT NULL,
+            PRIMARY KEY (id, layer_id)
+        ) PARTITION BY LIST (layer_id)
         """,
         """
         CREATE INDEX IF NOT EXISTS idx_geo_features_layer
@@ -55,57 +148,93 @@ async def _ensure_geo_tables(db: AsyncSession) -> None:
         CREATE INDEX IF NOT EXISTS idx_geo_features_geom
         ON geo_features USING GIST (geom)
         """,
+        # Expression indexes matching the slug lookup in
+        # get_layer_geojson, so name resolution is an index probe
+        # instead of a sequential scan with per-row regexes
+        """
+        CREATE INDEX IF NOT EXISTS idx_geo_layers_name_slug
+        ON geo_layers
+        (lower(regexp_replace(name, '[^a-z0-9]+', '_', 'g')))
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_geo_layers_title_slug
+        ON geo_layers
+        (lower(regexp_replace(COALESCE(title, ''), '[^a-z0-9]+', '_', 'g')))
+        """,
     ]
 
     for s in stmts:
         await db.execute(text(s))
     await db.commit()
+    _schema_ready = True
 
 
 @router.get("/list")
 async def list_layers(db: AsyncSession = Depends(get_db)):
-    """List available layers from geo_layers with feature counts."""
+    """List available layers from geo_layers with feature counts.
+
+    Responses are cached in-process for LAYERS_LIST_CACHE_TTL seconds.
+    """
+    global _list_cache
+    if _list_cache is not None and _list_cache[0] > time.monotonic():
+        return _list_cache[1]
+
     try:
         await _ensure_geo_tables(db)
         result = await db.execute(
             text(
                 """
                 SELECT l.name, l.title, l.geom_type, l.srid,
-                       COALESCE(cnt.count, 0) AS feature_count,
+                       cnt.count AS feature_count,
                        l.created_at,
                        l.metadata
                 FROM geo_layers l
-                LEFT JOIN (
-                    SELECT layer_id, COUNT(*) AS count
-                    FROM geo_features
-                    GROUP BY layer_id
-                ) cnt ON cnt.layer_id = l.id
+                LEFT JOIN LATERAL (
+                    SELECT COUNT(*) AS count
+                    FROM geo_features f
+                    WHERE f.layer_id = l.id
+                ) cnt ON true
                 ORDER BY l.title NULLS LAST, l.name
                 """
             )
         )
         rows = result.mappings().all()
-        return {"layers": [dict(r) for r in rows]}
+        payload = {"layers": [dict(r) for r in rows]}
+        _list_cache = (time.monotonic() + _LIST_CACHE_TTL, payload)
+        return payload
     except Exception as e:
         # Graceful degrade: intermittent DB errors should not break UI
-        if any(
-            s in str(e).lower()
-            for s in [
-                "connection",
-                "timeout",
-                "closed",
-                "terminating connection",
-                "cannot connect",
-            ]
-        ):
+        if _is_transient_db_error(e):
             return {"layers": [], "note": "db_unavailable"}
         raise HTTPException(
             status_code=500, detail=f"Database error: {str(e)}"
         )
 
 
+async def _stream_feature_collection(query, params):
+    """Yield a FeatureCollection one feature at a time.
+
+    Runs in its own session because the request-scoped session is
+    released before a StreamingResponse body is consumed. The
+    server-side cursor keeps memory constant instead of materializing
+    the whole jsonb_agg payload on both Postgres and Python.
+    """
+    async with async_session_maker() as session:
+        result = await session.stream(query, params)
+        yield '{"type":"FeatureCollection","features":['
+        first = True
+        async for (feature,) in result:
+            if first:
+                first = False
+                yield feature
+            else:
+                yield "," + feature
+        yield "]}"
+
+
 @router.get("/geojson/{layer_name}")
 async def get_layer_geojson(
+    request: Request,
     layer_name: str,
     bbox: Optional[str] = Query(
         None,
@@ -126,27 +255,52 @@ async def get_layer_geojson(
         # Resolve layer id with flexible matching:
         # - case-insensitive
         # - normalize non-alphanumerics to '_' (slug) for name/title
-        layer_row = await db.execute(
-            text(
-                """
-                SELECT id
-                FROM geo_layers
-                WHERE lower(regexp_replace(name, '[^a-z0-9]+', '_', 'g')) =
+        # Resolutions are cached in-process; misses hit the expression
+        # indexes created above.
+        slug = _slug_re.sub("_", layer_name).lower()
+        layer_id = _layer_id_cache.get(slug)
+        if layer_id is None:
+            layer_row = await db.execute(
+                text(
+                    """
+                    SELECT id
+                    FROM geo_layers
+                    WHERE lower(regexp_replace(name,
+                              '[^a-z0-9]+', '_', 'g')) =
                           lower(regexp_replace(:q, '[^a-z0-9]+', '_', 'g'))
-                   OR lower(regexp_replace(COALESCE(title, ''),
-                          '[^a-z0-9]+', '_', 'g')) =
+                       OR lower(regexp_replace(COALESCE(title, ''),
+                              '[^a-z0-9]+', '_', 'g')) =
                           lower(regexp_replace(:q, '[^a-z0-9]+', '_', 'g'))
-                LIMIT 1
+                    LIMIT 1
+                    """
+                ),
+                {"q": layer_name},
+            )
+            layer_id = layer_row.scalar()
+            if not layer_id:
+                raise HTTPException(status_code=404, detail="Layer not found")
+            layer_id = int(layer_id)
+            _layer_id_cache[slug] = layer_id
+
+        # Layer content only changes on (re)imports, so a weak ETag from
+        # the feature id watermark + count lets clients revalidate
+        # without re-serializing megabytes of JSON.
+        ver = await db.execute(
+            text(
+                """
+                SELECT COALESCE(MAX(id), 0) AS max_id, COUNT(*) AS cnt
+                FROM geo_features WHERE layer_id = :layer_id
                 """
             ),
-            {"q": layer_name},
+            {"layer_id": layer_id},
         )
-        layer_id = layer_row.scalar()
-        if not layer_id:
-            raise HTTPException(status_code=404, detail="Layer not found")
+        max_id, feature_count = ver.one()
+        etag = f'W/"{layer_id}-{max_id}-{feature_count}"'
+        headers = {"ETag": etag, "Cache-Control": "public, max-age=60"}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
 
-        # Build dynamic filter
-        filters = ["layer_id = :layer_id"]
+        # Dispatch to the precompiled statement matching the flags
         params: dict = {"layer_id": layer_id}
 
         if bbox:
@@ -156,56 +310,29 @@ async def get_layer_geojson(
                 raise HTTPException(
                     status_code=400, detail="Invalid bbox format"
                 )
-            filters.append(
-                "ST_Intersects(geom, ST_MakeEnvelope("
-                ":minx, :miny, :maxx, :maxy, 4326))"
-            )
             params.update(
                 {"minx": minx, "miny": miny, "maxx": maxx, "maxy": maxy}
             )
 
-        limit_clause = ""
         if limit and limit > 0:
-            limit_clause = " LIMIT :limit"
             params["limit"] = limit
 
-        query = text(
-            f"""
-            SELECT jsonb_build_object(
-                'type', 'FeatureCollection',
-                'features', COALESCE(jsonb_agg(features.feature), '[]'::jsonb)
-            ) AS geojson
-            FROM (
-                SELECT jsonb_build_object(
-                    'type', 'Feature',
-                    'properties', COALESCE(properties, '{{}}'::jsonb),
-                    'geometry', ST_AsGeoJSON(geom)::jsonb
-                ) AS feature
-                FROM geo_features
-                WHERE {' AND '.join(filters)}
-                {limit_clause}
-            ) AS features
-            """
-        )
+        if bbox:
+            query = _Q_BBOX_LIMIT if "limit" in params else _Q_BBOX
+        else:
+            query = _Q_ALL_LIMIT if "limit" in params else _Q_ALL
 
-        result = await db.execute(query, params)
-        data = result.scalar()
-        return data if data else {"type": "FeatureCollection", "features": []}
+        return StreamingResponse(
+            _stream_feature_collection(query, params),
+            media_type="application/geo+json",
+            headers=headers,
+        )
 
     except HTTPException:
         raise
     except Exception as e:
         # Graceful degrade for transient DB errors
-        if any(
-            s in str(e).lower()
-            for s in [
-                "connection",
-                "timeout",
-                "closed",
-                "terminating connection",
-                "cannot connect",
-            ]
-        ):
+        if _is_transient_db_error(e):
             return {"type": "FeatureCollection", "features": []}
         raise HTTPException(
             status_code=500, detail=f"Database error: {str(e)}"
@@ -1,34 +1,64 @@
-from typing import Any, List, Optional, Union
+from typing import Any, List, Optional
 
-from pydantic import BaseModel, HttpUrl, field_validator
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    HttpUrl,
+    TypeAdapter,
+    field_validator,
+)
+
+# Compiled once at import; validating through it runs the same C-level
+# URL parser the HttpUrl annotation would, without rebuilding the
+# adapter per call
+_URL_TA = TypeAdapter(HttpUrl)
 
 
 class GeoJSONGeometry(BaseModel):
     type: str
-    coordinates: Union[List[float], List[List[float]], List[List[List[float]]]]
+    coordinates: list
+
+    @field_validator("coordinates", mode="before")
+    @classmethod
+    def check_coordinates(cls, v):
+        # Shallow shape check instead of recursing into every point:
+        # the old triple-nested Union made Pydantic dispatch per
+        # coordinate, O(points) for a MultiPolygon. Anything deeper is
+        # left to PostGIS, which rejects malformed geometry on insert.
+        if not isinstance(v, (list, tuple)) or not v:
+            raise ValueError("coordinates must be a non-empty list")
+        if not isinstance(v[0], (int, float, list, tuple)):
+            raise ValueError(
+                "coordinates must contain numbers or nested rings"
+            )
+        return v
 
 
 class FeatureBase(BaseModel):
     title: str
     author: str
-    thumbnail: Optional[Union[HttpUrl, str]] = None
+    thumbnail: Optional[str] = None
     excerpt: str
     publication: str
-    link: Union[HttpUrl, str]
+    link: str
     location: GeoJSONGeometry
 
+
+class FeatureCreate(FeatureBase):
     @field_validator("thumbnail", "link", mode="before")
     @classmethod
     def allow_relative_url(cls, v):
-        if isinstance(v, str) and v.startswith("/"):
+        # Strict URL checking happens on input only — FeatureResponse
+        # inherits from FeatureBase and is built from rows that predate
+        # this rule, so it has to tolerate whatever the table holds.
+        # Relative paths skip URL parsing entirely; absolute URLs are
+        # checked through the cached adapter but stored as plain str.
+        if not isinstance(v, str) or v.startswith("/"):
             return v
+        _URL_TA.validate_python(v)
         return v
 
 
-class FeatureCreate(FeatureBase):
-    pass
-
-
 class FeatureUpdate(BaseModel):
     title: Optional[str] = None
     author: Optional[str] = None
@@ -42,8 +72,7 @@ class FeatureUpdate(BaseModel):
 class FeatureResponse(FeatureBase):
     id: int
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class FeatureListResponse(BaseModel):
@@ -2,9 +2,67 @@
 
 import asyncio
 
+import asyncpg
 from config import settings
 
 
+async def fast_ping() -> bool:
+    """Liveness probe: one raw asyncpg round-trip, no SQLAlchemy.
+
+    Skips the engine/compile layer entirely — connect, fetchval,
+    close — so a tight liveness loop measures the database and not the
+    ORM stack.
+    """
+    conn = await asyncpg.connect(
+        host=settings.pg_host,
+        port=settings.pg_port,
+        user=settings.pg_user,
+        password=settings.pg_pass,
+        database=settings.pg_database,
+    )
+    try:
+        return await conn.fetchval("SELECT 1") == 1
+    finally:
+        await conn.close()
+
+
+# Engines are process-wide singletons built on first use: creating one
+# per call redoes DNS + TLS on cloud Postgres, which swamps the probe
+# itself. Repeated probes in the same process get a warm pool checkout.
+_async_engine = None
+_sync_engine = None
+
+
+def get_async_engine():
+    global _async_engine
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        _async_engine = create_async_engine(
+            settings.database_url,
+            pool_size=5,
+            max_overflow=10,
+            pool_pre_ping=True,
+            pool_recycle=1800,
+            echo=settings.sql_echo,
+        )
+    return _async_engine
+
+
+def get_sync_engine():
+    global _sync_engine
+    if _sync_engine is None:
+        from sqlalchemy import create_engine
+
+        _sync_engine = create_engine(
+            settings.database_url_sync,
+            pool_pre_ping=True,
+            pool_recycle=1800,
+            echo=settings.sql_echo,
+        )
+    return _sync_engine
+
+
 async def test_database_connection():
     """Test database connection with debug output"""
 
@@ -24,42 +82,45 @@ async def test_database_connection():
 
     # Test async connection
     try:
-        from sqlalchemy.ext.asyncio import create_async_engine
+        from sqlalchemy import text
 
         print("Testing async connection...")
-        engine = create_async_engine(settings.database_url, echo=True)
-
-        from sqlalchemy import text
+        engine = get_async_engine()
 
         async with engine.begin() as conn:
             result = await conn.execute(text("SELECT 1 as test"))
             row = result.fetchone()
             print(f"✅ Async connection successful: {row}")
 
-        await engine.dispose()
-
     except Exception as e:
         print(f"❌ Async connection failed: {e}")
 
     # Test sync connection
     try:
-        from sqlalchemy import create_engine
+        from sqlalchemy import text
 
         print("Testing sync connection...")
-        sync_engine = create_engine(settings.database_url_sync, echo=True)
-
-        from sqlalchemy import text
+        sync_engine = get_sync_engine()
 
         with sync_engine.begin() as conn:
             result = conn.execute(text("SELECT 1 as test"))
             row = result.fetchone()
             print(f"✅ Sync connection successful: {row}")
 
-        sync_engine.dispose()
-
     except Exception as e:
         print(f"❌ Sync connection failed: {e}")
 
 
+async def _main():
+    try:
+        await test_database_connection()
+    finally:
+        # Dispose only at process shutdown, never per probe
+        if _async_engine is not None:
+            await _async_engine.dispose()
+        if _sync_engine is not None:
+            _sync_engine.dispose()
+
+
 if __name__ == "__main__":
-    asyncio.run(test_database_connection())
+    asyncio.run(_main())